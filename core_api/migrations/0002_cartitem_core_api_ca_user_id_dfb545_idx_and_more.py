@@ -0,0 +1,45 @@
+# Generated by Django 5.2.17 on 2026-08-28 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['user', 'added_at'], name='core_api_ca_user_id_dfb545_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['branch', 'stock'], name='core_api_in_branch__a5c2ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['company', 'status', '-created_at'], name='core_api_or_company_f216ac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'is_active'], name='core_api_pr_company_f79ea8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['company', 'category'], name='core_api_pr_company_657984_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['company', '-purchase_date'], name='core_api_pu_company_0e1114_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['company', '-created_at'], name='core_api_sa_company_64f0ea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['branch', '-created_at'], name='core_api_sa_branch__52a401_idx'),
+        ),
+    ]
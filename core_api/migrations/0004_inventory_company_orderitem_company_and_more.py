@@ -0,0 +1,50 @@
+# Generated by Django 5.2.17 on 2026-08-28 13:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0003_alter_cartitem_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core_api.company'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core_api.company'),
+        ),
+        migrations.AddField(
+            model_name='purchaseitem',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core_api.company'),
+        ),
+        migrations.AddField(
+            model_name='saleitem',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core_api.company'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['company', 'product'], name='core_api_in_company_5b4df0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['company', 'product'], name='core_api_or_company_5d235d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseitem',
+            index=models.Index(fields=['company', 'product'], name='core_api_pu_company_8a8b4a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['company', 'product'], name='core_api_sa_company_4f3ef2_idx'),
+        ),
+    ]
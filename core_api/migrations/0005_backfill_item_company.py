@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_company(apps, schema_editor):
+    """Rellena la FK denormalizada company desde el padre de cada item."""
+    pairs = [
+        ('PurchaseItem', 'Purchase', 'purchase_id'),
+        ('SaleItem', 'Sale', 'sale_id'),
+        ('OrderItem', 'Order', 'order_id'),
+        ('Inventory', 'Branch', 'branch_id'),
+    ]
+    for model_name, parent_name, parent_attr in pairs:
+        Model = apps.get_model('core_api', model_name)
+        Parent = apps.get_model('core_api', parent_name)
+        Model.objects.filter(company__isnull=True).update(
+            company_id=Subquery(
+                Parent.objects.filter(pk=OuterRef(parent_attr)).values('company_id')[:1]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0004_inventory_company_orderitem_company_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_company, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.17 on 2026-08-28 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0005_backfill_item_company'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='rut',
+            field=models.CharField(db_collation='C', help_text='RUT chileno de la empresa', max_length=12, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(db_collation='C', max_length=50, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='supplier',
+            name='rut',
+            field=models.CharField(db_collation='C', help_text='RUT chileno del proveedor (a validar)', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='rut',
+            field=models.CharField(db_collation='C', help_text='RUT chileno (a validar)', max_length=12, unique=True),
+        ),
+    ]
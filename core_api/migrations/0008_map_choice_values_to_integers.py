@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Mapeo de los antiguos valores TextChoices a los nuevos IntegerChoices.
+# Se ejecuta mientras las columnas siguen siendo varchar; la migración
+# siguiente las convierte a smallint (el cast '1'::smallint es trivial).
+_CHOICE_MAPS = [
+    ('User', 'role', {
+        'SUPER_ADMIN': 1,
+        'ADMIN_CLIENTE': 2,
+        'GERENTE': 3,
+        'VENDEDOR': 4,
+        'CLIENTE_FINAL': 5,
+    }),
+    ('Subscription', 'plan_name', {
+        'BASICO': 1,
+        'ESTANDAR': 2,
+        'PREMIUM': 3,
+    }),
+    ('Order', 'status', {
+        'PENDIENTE': 1,
+        'ENVIADO': 2,
+        'ENTREGADO': 3,
+        'ANULADA': 4,
+    }),
+    ('Sale', 'payment_method', {
+        'EFECTIVO': 1,
+        'TARJETA': 2,
+        'TRANSFERENCIA': 3,
+        'OTRO': 4,
+    }),
+]
+
+
+def _remap(apps, forward):
+    for model_name, field, mapping in _CHOICE_MAPS:
+        Model = apps.get_model('core_api', model_name)
+        for old, new in mapping.items():
+            src, dst = (old, str(new)) if forward else (str(new), old)
+            Model.objects.filter(**{field: src}).update(**{field: dst})
+
+
+def map_forward(apps, schema_editor):
+    _remap(apps, forward=True)
+
+
+def map_backward(apps, schema_editor):
+    _remap(apps, forward=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0007_alter_cartitem_added_at_alter_company_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(map_forward, map_backward),
+    ]
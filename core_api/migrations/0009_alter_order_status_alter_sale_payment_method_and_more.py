@@ -0,0 +1,33 @@
+# Generated by Django 5.2.17 on 2026-08-28 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0008_map_choice_values_to_integers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pendiente'), (2, 'Enviado'), (3, 'Entregado'), (4, 'Anulada')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='payment_method',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Efectivo'), (2, 'Tarjeta (Crédito/Débito)'), (3, 'Transferencia Bancaria'), (4, 'Otro')]),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='plan_name',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Básico'), (2, 'Estándar'), (3, 'Premium')]),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='role',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Super Administrador (TemucoSoft)'), (2, 'Administrador Cliente (Dueño)'), (3, 'Gerente'), (4, 'Vendedor (POS)'), (5, 'Cliente Final (E-commerce)')], default=4),
+        ),
+    ]
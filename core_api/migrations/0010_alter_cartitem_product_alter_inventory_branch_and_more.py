@@ -0,0 +1,44 @@
+# Generated by Django 5.2.17 on 2026-08-28 13:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0009_alter_order_status_alter_sale_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cartitem',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='core_api.product'),
+        ),
+        migrations.AlterField(
+            model_name='inventory',
+            name='branch',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='core_api.branch'),
+        ),
+        migrations.AlterField(
+            model_name='inventory',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='core_api.product'),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, to='core_api.product'),
+        ),
+        migrations.AlterField(
+            model_name='purchaseitem',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, to='core_api.product'),
+        ),
+        migrations.AlterField(
+            model_name='saleitem',
+            name='product',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, to='core_api.product'),
+        ),
+    ]
@@ -1,37 +1,44 @@
+from decimal import Decimal
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
-from django.utils import timezone
+from django.db.models.functions import Now
+
+from .validators import clean_rut
 
 # ==============================================================================
 # 1. CHOICES (Opciones Fijas)
 # ==============================================================================
 
-class UserRoles(models.TextChoices):
+# Almacenadas como smallint (2 bytes fijos): filas e índices más chicos y
+# comparaciones más rápidas que contra varchar.
+
+class UserRoles(models.IntegerChoices):
     # Roles mínimos obligatorios
-    SUPER_ADMIN = 'SUPER_ADMIN', 'Super Administrador (TemucoSoft)'
-    ADMIN_CLIENTE = 'ADMIN_CLIENTE', 'Administrador Cliente (Dueño)'
-    GERENTE = 'GERENTE', 'Gerente'
-    VENDEDOR = 'VENDEDOR', 'Vendedor (POS)'
+    SUPER_ADMIN = 1, 'Super Administrador (TemucoSoft)'
+    ADMIN_CLIENTE = 2, 'Administrador Cliente (Dueño)'
+    GERENTE = 3, 'Gerente'
+    VENDEDOR = 4, 'Vendedor (POS)'
     # Opcional, pero recomendado para e-commerce
-    CLIENTE_FINAL = 'CLIENTE_FINAL', 'Cliente Final (E-commerce)'
+    CLIENTE_FINAL = 5, 'Cliente Final (E-commerce)'
 
-class SubscriptionPlans(models.TextChoices):
-    BASICO = 'BASICO', 'Básico'
-    ESTANDAR = 'ESTANDAR', 'Estándar'
-    PREMIUM = 'PREMIUM', 'Premium'
+class SubscriptionPlans(models.IntegerChoices):
+    BASICO = 1, 'Básico'
+    ESTANDAR = 2, 'Estándar'
+    PREMIUM = 3, 'Premium'
 
-class OrderStatus(models.TextChoices):
-    PENDIENTE = 'PENDIENTE', 'Pendiente'
-    ENVIADO = 'ENVIADO', 'Enviado'
-    ENTREGADO = 'ENTREGADO', 'Entregado'
-    ANULADA = 'ANULADA', 'Anulada' # Añadido para gestión
+class OrderStatus(models.IntegerChoices):
+    PENDIENTE = 1, 'Pendiente'
+    ENVIADO = 2, 'Enviado'
+    ENTREGADO = 3, 'Entregado'
+    ANULADA = 4, 'Anulada' # Añadido para gestión
 
-class PaymentMethods(models.TextChoices):
-    EFECTIVO = 'EFECTIVO', 'Efectivo'
-    TARJETA = 'TARJETA', 'Tarjeta (Crédito/Débito)'
-    TRANSFERENCIA = 'TRANSFERENCIA', 'Transferencia Bancaria'
-    OTRO = 'OTRO', 'Otro'
+class PaymentMethods(models.IntegerChoices):
+    EFECTIVO = 1, 'Efectivo'
+    TARJETA = 2, 'Tarjeta (Crédito/Débito)'
+    TRANSFERENCIA = 3, 'Transferencia Bancaria'
+    OTRO = 4, 'Otro'
 
 # ==============================================================================
 # 2. MODELOS BASE (Tenant, User, Subscription)
@@ -40,14 +47,21 @@ class PaymentMethods(models.TextChoices):
 class Company(models.Model):
     """Representa al cliente (tenant) de TemucoSoft."""
     name = models.CharField(max_length=100)
-    rut = models.CharField(max_length=12, unique=True, help_text="RUT chileno de la empresa")
+    # Collation 'C': comparación bytewise en el índice único (el RUT se guarda normalizado)
+    rut = models.CharField(max_length=12, unique=True, db_collation='C', help_text="RUT chileno de la empresa")
     phone = models.CharField(max_length=20, null=True, blank=True)
     email = models.EmailField(unique=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # DEFAULT now() en la BD: evita enviar el timestamp como parámetro en cada INSERT
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
 
     class Meta:
         verbose_name_plural = "Companies"
 
+    def save(self, *args, **kwargs):
+        if self.rut:
+            self.rut = clean_rut(self.rut)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -60,10 +74,16 @@ class User(AbstractUser):
         blank=True,
         help_text="Cliente/Tenant al que pertenece el usuario (NULL para Super Admin)"
     )
-    rut = models.CharField(max_length=12, unique=True, help_text="RUT chileno (a validar)")
-    role = models.CharField(max_length=20, choices=UserRoles.choices, default=UserRoles.VENDEDOR)
+    # Collation 'C': comparación bytewise en el índice único (el RUT se guarda normalizado)
+    rut = models.CharField(max_length=12, unique=True, db_collation='C', help_text="RUT chileno (a validar)")
+    role = models.PositiveSmallIntegerField(choices=UserRoles.choices, default=UserRoles.VENDEDOR)
     is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+
+    def save(self, *args, **kwargs):
+        if self.rut:
+            self.rut = clean_rut(self.rut)
+        super().save(*args, **kwargs)
 
     def is_super_admin(self):
         return self.role == UserRoles.SUPER_ADMIN
@@ -77,13 +97,15 @@ class User(AbstractUser):
 class Subscription(models.Model):
     """Modelo para gestionar los planes de suscripción de cada Company."""
     company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name='subscription')
-    plan_name = models.CharField(max_length=20, choices=SubscriptionPlans.choices)
+    plan_name = models.PositiveSmallIntegerField(choices=SubscriptionPlans.choices)
     start_date = models.DateField()
     end_date = models.DateField()
     active = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"{self.company.name} - {self.get_plan_name_display()}"
+        # Usa la anotación _company_name si el queryset la adjuntó (evita N+1)
+        company_name = self.__dict__.get('_company_name') or self.company.name
+        return f"{company_name} - {self.get_plan_name_display()}"
 
 # ==============================================================================
 # 3. MODELOS OPERACIONALES Y TRANSACCIONALES
@@ -92,7 +114,8 @@ class Subscription(models.Model):
 class Product(models.Model):
     """Producto de una tienda/tenant."""
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='products')
-    sku = models.CharField(max_length=50, unique=True)
+    # Collation 'C': los lookups por SKU son igualdad pura, sin reglas de locale
+    sku = models.CharField(max_length=50, unique=True, db_collation='C')
     name = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
     price = models.DecimalField(
@@ -110,8 +133,17 @@ class Product(models.Model):
     category = models.CharField(max_length=100)
     is_active = models.BooleanField(default=True) # Para activar/desactivar en e-commerce
 
+    class Meta:
+        indexes = [
+            # Catálogo e-commerce: productos activos/por categoría de un tenant
+            models.Index(fields=['company', 'is_active']),
+            models.Index(fields=['company', 'category']),
+        ]
+
     def __str__(self):
-        return f"[{self.company.name}] {self.name}"
+        # Usa la anotación _company_name si el queryset la adjuntó (evita N+1)
+        company_name = self.__dict__.get('_company_name') or self.company.name
+        return f"[{company_name}] {self.name}"
 
 class Branch(models.Model):
     """Sucursal o punto de venta de una Company."""
@@ -122,22 +154,36 @@ class Branch(models.Model):
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"[{self.company.name}] {self.name}"
+        # Usa la anotación _company_name si el queryset la adjuntó (evita N+1)
+        company_name = self.__dict__.get('_company_name') or self.company.name
+        return f"[{company_name}] {self.name}"
 
 class Supplier(models.Model):
     """Proveedor de productos."""
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='suppliers')
     name = models.CharField(max_length=100)
-    rut = models.CharField(max_length=12, help_text="RUT chileno del proveedor (a validar)")
+    # Collation 'C': comparación bytewise (el RUT se guarda normalizado)
+    rut = models.CharField(max_length=12, db_collation='C', help_text="RUT chileno del proveedor (a validar)")
     contact = models.CharField(max_length=255)
 
+    def save(self, *args, **kwargs):
+        if self.rut:
+            self.rut = clean_rut(self.rut)
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"[{self.company.name}] {self.name}"
+        # Usa la anotación _company_name si el queryset la adjuntó (evita N+1)
+        company_name = self.__dict__.get('_company_name') or self.company.name
+        return f"[{company_name}] {self.name}"
 
 class Inventory(models.Model):
     """Relación Branch x Product (Inventario)."""
-    branch = models.ForeignKey(Branch, on_delete=models.CASCADE)
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # Denormalizado desde branch.company: permite reportes por tenant sin join
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+', null=True, blank=True, editable=False)
+    # db_constraint=False: sin trigger de integridad referencial por fila en los
+    # ingresos masivos; la integridad se mantiene a nivel ORM (on_delete).
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, db_constraint=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_constraint=False)
     stock = models.IntegerField(
         validators=[MinValueValidator(0)], 
         help_text="Stock físico (>=0)"
@@ -147,13 +193,35 @@ class Inventory(models.Model):
     class Meta:
         unique_together = ('branch', 'product')
         verbose_name_plural = "Inventories"
+        indexes = [
+            # Consultas de stock bajo por sucursal
+            models.Index(fields=['branch', 'stock']),
+            # Reportes de inventario por tenant
+            models.Index(fields=['company', 'product']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.company_id is None and self.branch_id is not None:
+            self.company_id = self.branch.company_id
+        super().save(*args, **kwargs)
         
     def __str__(self):
-        return f"{self.product.name} en {self.branch.name} (Stock: {self.stock})"
+        # Usa anotaciones si el queryset las adjuntó (evita N+1)
+        product_name = self.__dict__.get('_product_name') or self.product.name
+        branch_name = self.__dict__.get('_branch_name') or self.branch.name
+        return f"{product_name} en {branch_name} (Stock: {self.stock})"
 
 
 # --- 4. Compras (Purchase) ---
 
+def _items_total(items, price_field):
+    """Suma quantity * precio de los items en un solo SQL, sin instanciarlos."""
+    line_total = models.ExpressionWrapper(
+        models.F('quantity') * models.F(price_field),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+    return items.aggregate(total=models.Sum(line_total))['total'] or Decimal('0')
+
 class Purchase(models.Model):
     """Orden de Compra / Ingreso de Stock desde Proveedor."""
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='purchases')
@@ -161,20 +229,52 @@ class Purchase(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='purchases')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, help_text="Usuario que registra la compra (Gerente/Admin)")
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    purchase_date = models.DateTimeField(default=timezone.now, help_text="Fecha de la compra (no puede ser futura)")
+    purchase_date = models.DateTimeField(db_default=Now(), help_text="Fecha de la compra (no puede ser futura)")
+
+    class Meta:
+        indexes = [
+            # Listado de compras del tenant, de la más reciente a la más antigua
+            models.Index(fields=['company', '-purchase_date']),
+        ]
+
+    def recalculate_total(self):
+        """Recalcula el total desde los items en la BD y lo persiste con un UPDATE."""
+        self.total = _items_total(self.items, 'cost_at_purchase')
+        Purchase.objects.filter(pk=self.pk).update(total=self.total)
+        return self.total
 
     def __str__(self):
-        return f"Compra #{self.id} de {self.supplier.name if self.supplier else 'N/A'}"
+        # Usa la anotación _supplier_name si el queryset la adjuntó (evita N+1)
+        supplier_name = self.__dict__.get('_supplier_name') or (
+            self.supplier.name if self.supplier else 'N/A'
+        )
+        return f"Compra #{self.id} de {supplier_name}"
 
 class PurchaseItem(models.Model):
     """Detalle de productos en una Purchase."""
+    # Denormalizado desde purchase.company: reportes por tenant sin join al padre
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+', null=True, blank=True, editable=False)
     purchase = models.ForeignKey(Purchase, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.PROTECT) # Proteger la eliminación del producto
+    # db_constraint=False: INSERT en lote sin chequeo FK por fila; PROTECT sigue
+    # vigente a nivel ORM para impedir borrar el producto.
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, db_constraint=False)
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
     cost_at_purchase = models.DecimalField(max_digits=10, decimal_places=2) # Costo unitario registrado
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'product']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.company_id is None and self.purchase_id is not None:
+            self.company_id = self.purchase.company_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"{self.quantity} x {self.product.name}"
+        # Usa la anotación _product_name si el queryset la adjuntó (evita N+1)
+        product_name = self.__dict__.get('_product_name') or self.product.name
+        return f"{self.quantity} x {product_name}"
 
 # --- 5. Ventas POS (Sale) ---
 
@@ -184,21 +284,51 @@ class Sale(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.PROTECT, related_name='sales')
     user = models.ForeignKey(User, on_delete=models.PROTECT, help_text="Vendedor que realizó la venta")
     total = models.DecimalField(max_digits=12, decimal_places=2)
-    payment_method = models.CharField(max_length=20, choices=PaymentMethods.choices)
-    created_at = models.DateTimeField(default=timezone.now, help_text="Fecha de la venta (no puede ser futura)")
+    payment_method = models.PositiveSmallIntegerField(choices=PaymentMethods.choices)
+    created_at = models.DateTimeField(db_default=Now(), help_text="Fecha de la venta (no puede ser futura)")
+
+    class Meta:
+        indexes = [
+            # Listados y reportes de ventas por tenant o por sucursal
+            models.Index(fields=['company', '-created_at']),
+            models.Index(fields=['branch', '-created_at']),
+        ]
+
+    def recalculate_total(self):
+        """Recalcula el total desde los items en la BD y lo persiste con un UPDATE."""
+        self.total = _items_total(self.items, 'price_at_sale')
+        Sale.objects.filter(pk=self.pk).update(total=self.total)
+        return self.total
 
     def __str__(self):
-        return f"Venta POS #{self.id} en {self.branch.name}"
+        # Usa la anotación _branch_name si el queryset la adjuntó (evita N+1)
+        branch_name = self.__dict__.get('_branch_name') or self.branch.name
+        return f"Venta POS #{self.id} en {branch_name}"
 
 class SaleItem(models.Model):
     """Detalle de productos en una Sale."""
+    # Denormalizado desde sale.company: reportes por tenant sin join al padre
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+', null=True, blank=True, editable=False)
     sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    # db_constraint=False: INSERT en lote sin chequeo FK por fila (PROTECT a nivel ORM)
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, db_constraint=False)
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
     price_at_sale = models.DecimalField(max_digits=10, decimal_places=2) # Precio unitario registrado
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'product']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.company_id is None and self.sale_id is not None:
+            self.company_id = self.sale.company_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"{self.quantity} x {self.product.name}"
+        # Usa la anotación _product_name si el queryset la adjuntó (evita N+1)
+        product_name = self.__dict__.get('_product_name') or self.product.name
+        return f"{self.quantity} x {product_name}"
 
 # --- 6. Órdenes E-commerce (Order) ---
 
@@ -215,22 +345,49 @@ class Order(models.Model):
     )
     client_name = models.CharField(max_length=255) # Para clientes no autenticados
     client_email = models.EmailField() # Para clientes no autenticados
-    status = models.CharField(max_length=20, choices=OrderStatus.choices, default=OrderStatus.PENDIENTE)
+    status = models.PositiveSmallIntegerField(choices=OrderStatus.choices, default=OrderStatus.PENDIENTE)
     total = models.DecimalField(max_digits=12, decimal_places=2)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+
+    class Meta:
+        indexes = [
+            # Panel de órdenes: filtro por tenant + estado, ordenado por fecha
+            models.Index(fields=['company', 'status', '-created_at']),
+        ]
+
+    def recalculate_total(self):
+        """Recalcula el total desde los items en la BD y lo persiste con un UPDATE."""
+        self.total = _items_total(self.items, 'price_at_order')
+        Order.objects.filter(pk=self.pk).update(total=self.total)
+        return self.total
 
     def __str__(self):
         return f"Order E-comm #{self.id} ({self.get_status_display()})"
 
 class OrderItem(models.Model):
     """Detalle de productos en una Order."""
+    # Denormalizado desde order.company: reportes por tenant sin join al padre
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+', null=True, blank=True, editable=False)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
-    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    # db_constraint=False: INSERT en lote sin chequeo FK por fila (PROTECT a nivel ORM)
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, db_constraint=False)
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
     price_at_order = models.DecimalField(max_digits=10, decimal_places=2) # Precio unitario registrado
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'product']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.company_id is None and self.order_id is not None:
+            self.company_id = self.order.company_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"{self.quantity} x {self.product.name}"
+        # Usa la anotación _product_name si el queryset la adjuntó (evita N+1)
+        product_name = self.__dict__.get('_product_name') or self.product.name
+        return f"{self.quantity} x {product_name}"
 
 # --- 7. Carrito de Compras Temporal (CartItem) ---
 
@@ -240,14 +397,43 @@ class CartItem(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True, db_index=True) # Para usuarios no autenticados
     
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # db_constraint=False: ruta de escritura caliente del e-commerce (integridad a nivel ORM)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_constraint=False)
     quantity = models.IntegerField(validators=[MinValueValidator(1)]) # Validación quantity >= 1
-    added_at = models.DateTimeField(auto_now_add=True)
+    added_at = models.DateTimeField(db_default=Now(), editable=False)
     
     class Meta:
-        # Asegura unicidad: Un producto solo puede estar una vez en el carrito por usuario/sesión
-        unique_together = (('user', 'product'), ('session_key', 'product'))
+        # Asegura unicidad: Un producto solo puede estar una vez en el carrito
+        # por usuario/sesión. Índices únicos parciales: con unique_together,
+        # Postgres trata los pares (NULL, product) como no duplicados, por lo
+        # que la unicidad no se aplicaba a carritos anónimos (user NULL).
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'product'],
+                condition=models.Q(user__isnull=False),
+                name='uniq_cart_user_product',
+            ),
+            models.UniqueConstraint(
+                fields=['session_key', 'product'],
+                condition=models.Q(session_key__isnull=False),
+                name='uniq_cart_session_product',
+            ),
+        ]
+        indexes = [
+            # Carga del carrito de un usuario autenticado, ordenado por fecha
+            models.Index(fields=['user', 'added_at']),
+            # Lookup del carrito anónimo (índice parcial)
+            models.Index(
+                fields=['session_key', 'product'],
+                condition=models.Q(user__isnull=True),
+                name='idx_cart_anon',
+            ),
+        ]
 
     def __str__(self):
-        user_id = self.user.username if self.user else self.session_key
-        return f"Carrito de {user_id}: {self.product.name} ({self.quantity})"
+        # Usa anotaciones si el queryset las adjuntó (evita N+1)
+        user_id = self.__dict__.get('_username') or (
+            self.user.username if self.user else self.session_key
+        )
+        product_name = self.__dict__.get('_product_name') or self.product.name
+        return f"Carrito de {user_id}: {product_name} ({self.quantity})"
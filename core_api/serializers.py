@@ -1,5 +1,8 @@
 import re
 from datetime import date
+from django.db import transaction
+from django.db.models import Case, F, Prefetch, When
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -8,7 +11,7 @@ from rest_framework.exceptions import ValidationError
 from .models import (
     User, Company, Subscription, Product, Branch, Supplier, Inventory,
     Purchase, PurchaseItem, Sale, SaleItem, Order, OrderItem, CartItem,
-    UserRoles, SubscriptionPlans, OrderStatus
+    UserRoles, SubscriptionPlans, OrderStatus, PaymentMethods
 )
 
 # Importación del validador de RUT (se asume que existe el archivo validators.py)
@@ -22,6 +25,11 @@ class UserSerializer(serializers.ModelSerializer):
     company_name = serializers.CharField(source='company.name', read_only=True)
     role_display = serializers.CharField(source='get_role_display', read_only=True)
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Precarga las relaciones que este serializer dereferencia (evita N+1)."""
+        return queryset.select_related('company')
+
     class Meta:
         model = User
         fields = (
@@ -43,22 +51,25 @@ class UserSerializer(serializers.ModelSerializer):
             raise ValidationError({'rut': str(e)})
 
     def create(self, validated_data):
-        # Lógica para hashear la contraseña al crear el usuario
+        # Se hashea la contraseña antes de guardar: un solo INSERT
+        # (antes: INSERT + UPDATE para persistir el hash)
         password = validated_data.pop('password', None)
-        user = User.objects.create(**validated_data)
+        user = User(**validated_data)
         if password:
             user.set_password(password)
-            user.save()
+        else:
+            user.set_unusable_password()
+        user.save()
         return user
 
     def update(self, instance, validated_data):
-        # Lógica para hashear la contraseña al actualizar
+        # Se inyecta el hash en validated_data para que el update de DRF
+        # persista todo en un solo UPDATE (antes: dos saves)
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
         if password:
-            user.set_password(password)
-            user.save()
-        return user
+            instance.set_password(password)
+            validated_data['password'] = instance.password
+        return super().update(instance, validated_data)
 
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -97,17 +108,25 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 # ==============================================================================
 
 class BranchSerializer(serializers.ModelSerializer):
+    # Columnas suficientes para un listado; los viewsets aplican
+    # queryset.only(*list_only_fields) cuando action == 'list' para no
+    # arrastrar address/phone desde la BD.
+    list_only_fields = ('id', 'company', 'name', 'is_active')
+
     class Meta:
         model = Branch
         fields = '__all__'
         read_only_fields = ('company',)
 
 class SupplierSerializer(serializers.ModelSerializer):
+    # Evita leer el TEXT de contacto en los listados (ver BranchSerializer)
+    list_only_fields = ('id', 'company', 'name', 'rut')
+
     class Meta:
         model = Supplier
         fields = '__all__'
         read_only_fields = ('company',)
-    
+
     def validate_rut(self, value):
         """Validación de RUT Chileno para Proveedores."""
         try:
@@ -116,6 +135,9 @@ class SupplierSerializer(serializers.ModelSerializer):
             raise ValidationError({'rut': str(e)})
 
 class ProductSerializer(serializers.ModelSerializer):
+    # Catálogo: deja description (TOAST) y cost fuera del SELECT de listados
+    list_only_fields = ('id', 'company', 'sku', 'name', 'price', 'category', 'is_active')
+
     class Meta:
         model = Product
         fields = '__all__'
@@ -125,6 +147,11 @@ class InventorySerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     branch_name = serializers.CharField(source='branch.name', read_only=True)
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Precarga las relaciones que este serializer dereferencia (evita N+1)."""
+        return queryset.select_related('product', 'branch')
+
     class Meta:
         model = Inventory
         fields = ('branch', 'branch_name', 'product', 'product_name', 'stock', 'reorder_point')
@@ -133,13 +160,134 @@ class InventorySerializer(serializers.ModelSerializer):
 # 4. SERIALIZERS TRANSACCIONALES (Purchase, Sale, Order, Items)
 # ==============================================================================
 
+# SQL (Postgres) que arma los items anidados como JSON dentro del SELECT del
+# padre: una sola consulta y cero objetos Python por item en los listados.
+_ITEMS_JSON_SQL = (
+    "(SELECT json_agg(json_build_object("
+    "'id', it.id, 'product', it.product_id, 'product_name', p.name, "
+    "'quantity', it.quantity, '{price_field}', it.{price_field})) "
+    "FROM {item_table} it JOIN core_api_product p ON p.id = it.product_id "
+    "WHERE it.{parent_column} = {parent_table}.id)"
+)
+
+
+def _items_json_annotation(item_table, parent_table, parent_column, price_field):
+    """Construye la anotación RawSQL items_json para un modelo transaccional."""
+    return RawSQL(
+        _ITEMS_JSON_SQL.format(
+            item_table=item_table,
+            parent_table=parent_table,
+            parent_column=parent_column,
+            price_field=price_field,
+        ),
+        [],
+    )
+
+
+def _adjust_inventory_stock(branch, deltas, create_missing=False):
+    """Aplica deltas de stock {product_id: delta} con un solo UPDATE por sucursal.
+
+    Debe llamarse dentro de transaction.atomic(). Bloquea las filas afectadas
+    con un único select_for_update() y despacha el delta de cada producto con
+    Case/When, en vez de un ciclo leer-modificar-guardar por item (patrón N+1).
+    """
+    locked = Inventory.objects.select_for_update().filter(
+        branch=branch, product_id__in=deltas
+    )
+    existing = set(locked.values_list('product_id', flat=True))
+    missing = [pid for pid in deltas if pid not in existing]
+
+    if missing and not create_missing:
+        raise serializers.ValidationError(
+            {'items': f"No existe inventario en la sucursal para los productos: {missing}."}
+        )
+
+    if existing:
+        locked.update(stock=Case(
+            *[When(product_id=pid, then=F('stock') + delta)
+              for pid, delta in deltas.items() if pid in existing]
+        ))
+    if missing:
+        # Compras sobre productos sin inventario previo: se crean las filas en lote.
+        # bulk_create no pasa por save(), así que la compañía se asigna aquí.
+        Inventory.objects.bulk_create(
+            [Inventory(branch=branch, company_id=branch.company_id,
+                       product_id=pid, stock=deltas[pid]) for pid in missing]
+        )
+
+    # Validación post-update en una sola consulta: el stock no puede quedar negativo.
+    negatives = list(
+        Inventory.objects.filter(branch=branch, product_id__in=deltas, stock__lt=0)
+        .values_list('product_id', flat=True)
+    )
+    if negatives:
+        raise serializers.ValidationError(
+            {'items': f"Stock insuficiente para los productos: {negatives}."}
+        )
+
+
+def _stock_deltas(items_data, sign=1):
+    """Agrupa los items validados en {product_id: delta}, sumando duplicados."""
+    deltas = {}
+    for item in items_data:
+        product_id = item['product'].pk
+        deltas[product_id] = deltas.get(product_id, 0) + sign * item['quantity']
+    return deltas
+
+class _BulkItemListSerializer(serializers.ListSerializer):
+    """ListSerializer base que persiste los items anidados en lote.
+
+    El create() por defecto de DRF llama a child.create() por item (un INSERT
+    cada uno); aquí se arma la lista completa y se inserta con bulk_create.
+    update() aplica los cambios con bulk_update sobre los campos editables.
+    """
+    parent_field = None     # nombre de la FK al padre (para denormalizar company)
+    update_fields = ()      # campos que update() persiste con bulk_update
+
+    def _refresh_parent_totals(self, items):
+        """Recalcula el total de cada padre afectado (un aggregate + UPDATE c/u)."""
+        parents = {getattr(item, self.parent_field, None) for item in items}
+        for parent in parents:
+            if parent is not None:
+                parent.recalculate_total()
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        items = [model(**attrs) for attrs in validated_data]
+        for item in items:
+            # bulk_create no pasa por save(): se replica la denormalización
+            parent = getattr(item, self.parent_field, None)
+            if item.company_id is None and parent is not None:
+                item.company_id = parent.company_id
+        items = model.objects.bulk_create(items, batch_size=500)
+        self._refresh_parent_totals(items)
+        return items
+
+    def update(self, instances, validated_data):
+        instances = list(instances)
+        for instance, attrs in zip(instances, validated_data):
+            for field, value in attrs.items():
+                setattr(instance, field, value)
+        self.child.Meta.model.objects.bulk_update(
+            instances, self.update_fields, batch_size=500
+        )
+        self._refresh_parent_totals(instances)
+        return instances
+
+
+class PurchaseItemListSerializer(_BulkItemListSerializer):
+    parent_field = 'purchase'
+    update_fields = ('product', 'quantity', 'cost_at_purchase')
+
+
 class PurchaseItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
-    
+
     class Meta:
         model = PurchaseItem
         # Se excluye 'purchase' porque se asigna automáticamente en el serializer de Purchase
         fields = ('id', 'product', 'product_name', 'quantity', 'cost_at_purchase')
+        list_serializer_class = PurchaseItemListSerializer
         extra_kwargs = {
             'cost_at_purchase': {'required': True} # El costo debe ser fijo al momento de la compra
         }
@@ -150,6 +298,13 @@ class PurchaseSerializer(serializers.ModelSerializer):
     branch_name = serializers.CharField(source='branch.name', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Precarga relaciones e items (con su producto) para listados sin N+1."""
+        return queryset.select_related('supplier', 'branch', 'user').prefetch_related(
+            Prefetch('items', queryset=PurchaseItem.objects.select_related('product'))
+        )
+
     class Meta:
         model = Purchase
         fields = (
@@ -159,16 +314,57 @@ class PurchaseSerializer(serializers.ModelSerializer):
         read_only_fields = ('company', 'total', 'user_username')
         extra_kwargs = {
             'user': {'required': False},
+            # Opcional: si se omite, aplica el DEFAULT now() de la BD
+            'purchase_date': {'required': False},
         }
 
     def validate_purchase_date(self, value):
         """Validación de fecha: Purchase.date no mayor a hoy."""
         # Comparación solo de fecha, ignorando la hora
-        if value.date() > timezone.now().date(): 
+        if value.date() > timezone.now().date():
             raise serializers.ValidationError("La fecha de compra no puede ser futura.")
         return value
-    
-    # Se debe implementar la lógica de create/update para manejar los items y actualizar el stock.
+
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        # El total se calcula en Python a partir de los items para evitar un
+        # segundo UPDATE sobre la compra recién creada.
+        validated_data['total'] = sum(
+            item['quantity'] * item['cost_at_purchase'] for item in items_data
+        )
+        with transaction.atomic():
+            purchase = Purchase.objects.create(**validated_data)
+            # Un solo INSERT por lote en vez de un INSERT por item.
+            # bulk_create no pasa por save(), así que la compañía se asigna aquí.
+            PurchaseItem.objects.bulk_create(
+                [PurchaseItem(purchase=purchase, company_id=purchase.company_id, **item)
+                 for item in items_data],
+                batch_size=500,
+            )
+            # Una compra ingresa stock: un solo UPDATE para todas las filas.
+            _adjust_inventory_stock(
+                purchase.branch, _stock_deltas(items_data), create_missing=True
+            )
+        return purchase
+
+
+class PurchaseListSerializer(PurchaseSerializer):
+    """Variante de solo lectura para listados: los items llegan pre-serializados
+    como JSON desde Postgres (json_agg), sin instanciar un objeto por item."""
+    items = serializers.JSONField(source='items_json', read_only=True)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('supplier', 'branch', 'user').annotate(
+            items_json=_items_json_annotation(
+                'core_api_purchaseitem', 'core_api_purchase', 'purchase_id', 'cost_at_purchase'
+            )
+        )
+
+
+class SaleItemListSerializer(_BulkItemListSerializer):
+    parent_field = 'sale'
+    update_fields = ('product', 'quantity', 'price_at_sale')
 
 
 class SaleItemSerializer(serializers.ModelSerializer):
@@ -177,6 +373,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = SaleItem
         fields = ('id', 'product', 'product_name', 'quantity', 'price_at_sale')
+        list_serializer_class = SaleItemListSerializer
         extra_kwargs = {
             'price_at_sale': {'required': True} # Precio de venta debe ser fijo al momento de la venta
         }
@@ -186,21 +383,67 @@ class SaleSerializer(serializers.ModelSerializer):
     branch_name = serializers.CharField(source='branch.name', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Precarga relaciones e items (con su producto) para listados sin N+1."""
+        return queryset.select_related('branch', 'user').prefetch_related(
+            Prefetch('items', queryset=SaleItem.objects.select_related('product'))
+        )
+
     class Meta:
         model = Sale
         fields = ('id', 'company', 'branch', 'branch_name', 'user', 'user_username', 'total', 'payment_method', 'created_at', 'items')
         read_only_fields = ('company', 'total', 'user_username')
         extra_kwargs = {
             'user': {'required': False},
+            # Opcional: si se omite, aplica el DEFAULT now() de la BD
+            'created_at': {'required': False},
         }
 
     def validate_created_at(self, value):
         """Validación de fecha: Sale.created_at no puede ser futura."""
-        if value > timezone.now(): 
+        if value > timezone.now():
             raise serializers.ValidationError("La fecha de la venta POS no puede ser futura.")
         return value
 
-    # Se debe implementar la lógica de create para manejar los items y actualizar el stock.
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        # El total se calcula en Python a partir de los items para evitar un
+        # segundo UPDATE sobre la venta recién creada.
+        validated_data['total'] = sum(
+            item['quantity'] * item['price_at_sale'] for item in items_data
+        )
+        with transaction.atomic():
+            sale = Sale.objects.create(**validated_data)
+            # Un solo INSERT por lote en vez de un INSERT por item.
+            # bulk_create no pasa por save(), así que la compañía se asigna aquí.
+            SaleItem.objects.bulk_create(
+                [SaleItem(sale=sale, company_id=sale.company_id, **item)
+                 for item in items_data],
+                batch_size=500,
+            )
+            # Una venta descuenta stock; si queda negativo se revierte todo.
+            _adjust_inventory_stock(sale.branch, _stock_deltas(items_data, sign=-1))
+        return sale
+
+
+class SaleListSerializer(SaleSerializer):
+    """Variante de solo lectura para listados: los items llegan pre-serializados
+    como JSON desde Postgres (json_agg), sin instanciar un objeto por item."""
+    items = serializers.JSONField(source='items_json', read_only=True)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('branch', 'user').annotate(
+            items_json=_items_json_annotation(
+                'core_api_saleitem', 'core_api_sale', 'sale_id', 'price_at_sale'
+            )
+        )
+
+
+class OrderItemListSerializer(_BulkItemListSerializer):
+    parent_field = 'order'
+    update_fields = ('product', 'quantity', 'price_at_order')
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -209,6 +452,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ('id', 'product', 'product_name', 'quantity', 'price_at_order')
+        list_serializer_class = OrderItemListSerializer
         extra_kwargs = {
             'price_at_order': {'required': True}
         }
@@ -217,6 +461,13 @@ class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True) # Los items se crean en el checkout, no aquí.
     client_username = serializers.CharField(source='client_user.username', read_only=True)
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Precarga relaciones e items (con su producto) para listados sin N+1."""
+        return queryset.select_related('client_user').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+        )
+
     class Meta:
         model = Order
         fields = ('id', 'company', 'client_user', 'client_username', 'client_name', 'client_email', 'status', 'total', 'created_at', 'items')
@@ -226,13 +477,32 @@ class OrderSerializer(serializers.ModelSerializer):
         }
 
 
+class OrderListSerializer(OrderSerializer):
+    """Variante de solo lectura para listados: los items llegan pre-serializados
+    como JSON desde Postgres (json_agg), sin instanciar un objeto por item."""
+    items = serializers.JSONField(source='items_json', read_only=True)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('client_user').annotate(
+            items_json=_items_json_annotation(
+                'core_api_orderitem', 'core_api_order', 'order_id', 'price_at_order'
+            )
+        )
+
+
 # --- 5. Carrito de Compras (CartItem) ---
 
 class CartItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     # Price y Stock se deben obtener y mostrar aquí, pero son campos read_only
     current_price = serializers.DecimalField(source='product.price', max_digits=10, decimal_places=2, read_only=True)
-    
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Precarga las relaciones que este serializer dereferencia (evita N+1)."""
+        return queryset.select_related('product', 'user')
+
     class Meta:
         model = CartItem
         fields = ('id', 'user', 'session_key', 'product', 'product_name', 'quantity', 'current_price', 'added_at')
@@ -243,3 +513,35 @@ class CartItemSerializer(serializers.ModelSerializer):
         if value < 1:
             raise serializers.ValidationError("La cantidad debe ser al menos 1.")
         return value
+
+
+# ==============================================================================
+# 6. SERIALIZERS DE REPORTES (consumen dicts de values(), sin instanciar modelos)
+# ==============================================================================
+
+class SaleReportSerializer(serializers.Serializer):
+    """Fila del libro de ventas, de solo lectura.
+
+    Consume los dicts de Sale.objects.values('id', 'branch__name',
+    'user__username', 'total', 'payment_method', 'created_at'): se salta
+    Model.__init__/from_db y los descriptores de campo, que en listados
+    anchos dominan el costo de serialización.
+    """
+    id = serializers.IntegerField(read_only=True)
+    branch_name = serializers.CharField(source='branch__name', read_only=True)
+    user_username = serializers.CharField(source='user__username', read_only=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    payment_method = serializers.ChoiceField(choices=PaymentMethods.choices, read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+
+
+class InventoryReportSerializer(serializers.Serializer):
+    """Fila del resumen de inventario, de solo lectura.
+
+    Consume los dicts de Inventory.objects.values('branch__name',
+    'product__name', 'stock', 'reorder_point').
+    """
+    branch_name = serializers.CharField(source='branch__name', read_only=True)
+    product_name = serializers.CharField(source='product__name', read_only=True)
+    stock = serializers.IntegerField(read_only=True)
+    reorder_point = serializers.IntegerField(read_only=True)